@@ -3,6 +3,7 @@ import adsk.core, adsk.fusion, traceback, os, sys, json
 # ───────────── configure once ─────────────
 EXPORT_DIR = r"C:\Users\sayan\OneDrive\Documents\Visual_Studio_2022\Freelance\f3d_script"
 DIMS_JSON  = os.path.join(EXPORT_DIR, 'dims.json')
+DONE_JSON  = os.path.join(EXPORT_DIR, 'export_done.json')   # written last; the web app waits for it
 
 # Default values (fallback if JSON is missing or a key is absent)
 DEFAULT_DIMS = {
@@ -37,6 +38,12 @@ def load_dimensions():
             )
     return DEFAULT_DIMS.copy()
 
+def write_done(dims, exported, skipped, error=None):
+    """Record the finished run in DONE_JSON (atomically, so a reader never sees half of it)."""
+    with open(DONE_JSON + '.tmp', 'w') as f:
+        json.dump({'dims': dims, 'exported': exported, 'skipped': skipped, 'error': error}, f, indent=2)
+    os.replace(DONE_JSON + '.tmp', DONE_JSON)
+
 def largest_planar_face(body):
     best, area = None, 0.0
     for f in body.faces:
@@ -55,6 +62,7 @@ def flat_pattern_for(comp):
 # ───────────────────────── main ─────────────────────────
 def run(context):
     ui = None
+    dims, exported, skipped = None, [], []
     try:
         app    = adsk.core.Application.get()
         ui     = app.userInterface
@@ -80,8 +88,6 @@ def run(context):
         exp_mgr = design.exportManager
         root    = design.rootComponent
 
-        exported, skipped = [], []
-
         # 4) Loop occurrences
         for occ in root.occurrences:
             name = occ.name.lower()
@@ -104,15 +110,20 @@ def run(context):
                 opts.convertToPolylineTolerance = POLYLINE_TOLERANCE
 
             exp_mgr.execute(opts)
-            exported.append(compName)
+            exported.append(os.path.basename(dxfFile))
 
-        # 5) Report
+        # 5) Report (the marker first: the message box waits for a click)
+        write_done(dims, exported, skipped)
         msg  = f"✅ DXF export done.\n\nExported: {exported or '-'}"
         if skipped:
             msg += f"\nSkipped (no planar faces): {skipped}"
         ui.messageBox(msg)
 
     except:
+        try:
+            write_done(dims, exported, skipped, traceback.format_exc())
+        except Exception:
+            pass
         if ui:
             ui.messageBox('⚠️ Failed:\n' + traceback.format_exc())
         else:
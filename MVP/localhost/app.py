@@ -1,13 +1,22 @@
 # app.py
 # Local web server using Flask to receive parameters and trigger Fusion 360 script
 
-from flask import Flask, request, render_template_string, jsonify
+from flask import Flask, request, render_template_string, jsonify, g, Response, stream_with_context
+from flask import got_request_exception
+from werkzeug.wsgi import ClosingIterator
+from contextlib import contextmanager
 import json
 import os
+import queue
 import subprocess
 import sys
+import threading
 import time # Import time module for small delays
 
+import downloads
+import metrics
+import variants
+
 app = Flask(__name__)
 
 # --- Configuration ---
@@ -30,6 +39,89 @@ FUSION_PATH = r"C:/Users/sayan/AppData/Local/Autodesk/webdeploy/production/6a0c9
 #                The example path below is illustrative - YOU MUST FIND YOURS.
 SCRIPT_PATH = r"C:\Users\sayan\AppData\Roaming\Autodesk\Autodesk Fusion 360\API\Scripts\NewScript1\NewScript1.py" # <-- VERIFY THIS PATH!
 
+# The Fusion 360 design the script runs on. Its hash is part of the cache key, so
+# saving a changed model makes the next submission re-export even with the same dims.
+MODEL_PATH = os.path.join(EXPORT_DIR, 'Acrylic-Box-parametric-screws.f3d') # <-- VERIFY THIS PATH!
+
+# Colored copies of the exported DXFs (same layout changeColor.py produces).
+COLORED_DIR = os.path.join(EXPORT_DIR, 'colored')
+
+# Export completion is detected from the marker file the script writes after its
+# last export (see NewScript1.py), not from the launcher process: with Fusion
+# already open, FusionLauncher.exe may exit at once or stay alive.
+DONE_JSON      = os.path.join(EXPORT_DIR, 'export_done.json')
+EXPORT_PARTS   = ('Top_flat.dxf', 'Side1_flat.dxf', 'Side2_flat.dxf')   # every job must produce all of these
+EXPORT_TIMEOUT = 600    # s to wait for the marker before giving up on a job
+POLL_INTERVAL  = 0.5    # s between checks of EXPORT_DIR
+
+# Lock file shared with precompute.py: whoever holds it owns dims.json and the outputs.
+# A lock older than LOCK_STALE is left over from a crashed process and is taken over.
+LOCK_PATH  = os.path.join(EXPORT_DIR, '.job.lock')
+LOCK_STALE = EXPORT_TIMEOUT + 300   # s
+
+# Set to True to add a Server-Timing header with the request's total time (ms) to every response.
+# Jobs run on the worker thread, outside any request; their stage timings are shown with the last job.
+TIMING_HEADERS = False
+
+# --- Metrics (served in Prometheus text format at /metrics) ---
+STAGES = ('json_write', 'launch', 'export', 'post_process')
+
+HTTP_REQUESTS = metrics.Counter(
+    'f3d_http_requests_total', 'HTTP requests handled, by endpoint, method and status.',
+    ('endpoint', 'method', 'status'))
+HTTP_SECONDS = metrics.Histogram(
+    'f3d_http_request_duration_seconds',
+    'Wall time spent handling HTTP requests; streamed downloads are timed until their last chunk is sent.',
+    ('endpoint',))
+STAGE_SECONDS = metrics.Histogram(
+    'f3d_job_stage_duration_seconds', 'Export job latency by pipeline stage.', ('stage',))
+for _stage_name in STAGES:
+    STAGE_SECONDS.touch(stage=_stage_name)
+QUEUE_DEPTH = metrics.Gauge(
+    'f3d_job_queue_depth', 'Export jobs accepted and not yet finished (waiting, exporting or post-processing).')
+FUSION_INFLIGHT = metrics.Gauge(
+    'f3d_fusion_inflight', 'Fusion 360 exports launched whose DXFs have not landed yet.')
+# source="form": the form's re-export cache; source="variants": the precomputed variant store.
+CACHE_SOURCES = ('form', 'variants')
+CACHE_HITS = metrics.Counter(
+    'f3d_cache_hits_total', 'Requests answered from existing outputs without running Fusion 360, by source.',
+    ('source',))
+CACHE_MISSES = metrics.Counter(
+    'f3d_cache_misses_total', 'Requests the cache could not answer (a Fusion 360 run or a 404), by source.',
+    ('source',))
+for _source in CACHE_SOURCES:
+    CACHE_HITS.inc(0, source=_source)
+    CACHE_MISSES.inc(0, source=_source)
+CACHE_HIT_RATIO = metrics.Gauge(
+    'f3d_cache_hit_ratio', 'Cache hits divided by all cache lookups, per source (0 when there were none).',
+    ('source',), func=lambda: {(source,): _cache_hit_ratio(source) for source in CACHE_SOURCES})
+ERRORS = metrics.Counter(
+    'f3d_errors_total', 'Errors by kind.', ('kind',))
+DEDUP_ENTITIES = metrics.Counter(
+    'f3d_dedup_entities_removed_total', 'Duplicate or overlapping entities removed before cutting.')
+DEDUP_LENGTH = metrics.Counter(
+    'f3d_dedup_removed_length_mm_total', 'Cut length (mm) saved by removing duplicated paths.')
+VALIDATION_PROBLEMS = metrics.Counter(
+    'f3d_validation_problems_total', 'Geometry pre-flight findings (open ends, self-intersections, crossings).',
+    ('kind',))
+
+# Index of precomputed variants (see precompute.py), reloaded when index.json or the model changes.
+_variant_index = None
+_variant_index_version = None
+_variant_lock = threading.Lock()
+
+# Jobs share dims.json and the output folders, so they run strictly one after
+# another: form submissions wait in _job_queue for the single worker thread, and
+# every job holds _job_lock and export_lock() from writing dims.json until
+# post-processing (and, for precompute.py, storing) is done.
+_job_lock = threading.Lock()
+_job_queue = queue.Queue()
+_job_worker = None
+_job_worker_lock = threading.Lock()
+# Outcome of the last job: {'dims', 'key', 'ok', 'message', 'timings', 'finished'} plus 'preflight' and
+# 'dims_file' (digest of the dims.json it wrote) on success; key is its cache_key().
+_last_job = None
+
 # --- HTML Template for the Web Form ---
 HTML_FORM = """
 <!doctype html>
@@ -80,6 +172,8 @@ HTML_FORM = """
             <label for="Width_Screws">Width Screws:</label>
             <input type="number" id="Width_Screws" name="Width_Screws" step="1" required value="4"><br><br>
 
+            <label><input type="checkbox" name="force" value="1"> Re-run Fusion 360 even if these parameters were already exported</label><br>
+
             <button type="submit">Update Parameters & Run Export</button>
         </form>
 
@@ -87,14 +181,468 @@ HTML_FORM = """
             <div class="message {{ message_type }}">{{ message }}</div>
             {% if export_dir %}
                 <div class="info">Export files should appear in: <code>{{ export_dir }}</code></div>
+                <div class="info">Once the export finishes, download everything as <a href="/download">one zip</a>.</div>
             {% endif %}
             <div class="info">Check Fusion 360 UI for detailed script status messages.</div>
         {% endif %}
+        {% if last_job %}
+            <div class="message {{ 'success' if last_job.ok else 'error' }}">
+                Last job ({{ last_job.finished }}, {% set d = last_job.dims %}{{ d.Length }} × {{ d.Width }} × {{ d.Height }} mm,
+                {{ d.Length_Screws }}/{{ d.Width_Screws }} screws): {{ last_job.message }}
+            </div>
+            {% if last_job.timings %}
+                <div class="info">Stage timings:
+                    {% for stage, secs in last_job.timings.items() %}{{ stage }} {{ '%.1f' % secs }} s{{ ', ' if not loop.last }}{% endfor %}
+                </div>
+            {% endif %}
+            {% if last_job.preflight %}
+                <div class="info">Geometry pre-flight:
+                    {% for name, problems in last_job.preflight %}
+                        <a href="/download/colored/{{ name }}">{{ name }}</a>
+                        {{ problems ~ ' problem(s)' if problems else 'OK' }}{{ ',' if not loop.last }}
+                    {% endfor %}
+                </div>
+            {% endif %}
+        {% endif %}
     </div>
 </body>
 </html>
 """
 
+# --- Instrumentation helpers ---
+def _cache_hit_ratio(source):
+    hits, misses = CACHE_HITS.get(source=source), CACHE_MISSES.get(source=source)
+    return hits / (hits + misses) if hits + misses else 0.0
+
+@contextmanager
+def timed_stage(stage, timings=None):
+    """Time a pipeline stage into STAGE_SECONDS (and into the `timings` dict of its job, if given)."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, stage=stage)
+        if timings is not None:
+            timings[stage] = timings.get(stage, 0.0) + elapsed
+
+@app.before_request
+def _start_timer():
+    g.request_start = time.perf_counter()
+
+@app.after_request
+def _record_request(response):
+    elapsed = time.perf_counter() - g.request_start
+    endpoint = request.endpoint or 'unknown'
+    g.recorded = True
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=response.status_code)
+    if response.is_streamed:
+        # Observed when the server closes the body, i.e. after the last chunk (or a disconnect).
+        start = g.request_start
+        response.response = ClosingIterator(response.response, lambda: HTTP_SECONDS.observe(
+            time.perf_counter() - start, endpoint=endpoint))
+    else:
+        HTTP_SECONDS.observe(elapsed, endpoint=endpoint)
+    if TIMING_HEADERS:
+        # Headers go out before a streamed body, so 'total' is the time to build the response.
+        response.headers['Server-Timing'] = f"total;dur={elapsed * 1000:.1f}"
+    return response
+
+def _count_unhandled(sender, exception, **extra):
+    ERRORS.inc(kind='unhandled')
+
+got_request_exception.connect(_count_unhandled, app)
+
+@app.teardown_request
+def _record_failed_request(exc):
+    """after_request is skipped when an exception propagates (e.g. in debug mode); count those as 500s here."""
+    if g.get('recorded') or 'request_start' not in g:
+        return
+    endpoint = request.endpoint or 'unknown'
+    HTTP_REQUESTS.inc(endpoint=endpoint, method=request.method, status=500)
+    HTTP_SECONDS.observe(time.perf_counter() - g.request_start, endpoint=endpoint)
+
+def outputs_present():
+    """True if every raw DXF in EXPORT_DIR has a colored counterpart."""
+    raw = [f for f in os.listdir(EXPORT_DIR) if f.lower().endswith('.dxf')] if os.path.isdir(EXPORT_DIR) else []
+    return bool(raw) and all(os.path.exists(os.path.join(COLORED_DIR, f)) for f in raw)
+
+def post_process(exported):
+    """
+    Dedupe, then color, the given DXFs from EXPORT_DIR into COLORED_DIR, and
+    run the geometry pre-flight on the result. The raw exports are left
+    untouched. Returns the file names.
+    """
+    import changeColor, dedupe, validate   # need ezdxf; imported lazily so the form works without it
+    os.makedirs(COLORED_DIR, exist_ok=True)
+    processed = []
+    for fname in exported:
+        src = os.path.join(EXPORT_DIR, fname)
+        dest = os.path.join(COLORED_DIR, fname)
+        report = dedupe.process_file(src, dest)
+        DEDUP_ENTITIES.inc(report['duplicates'] + report['merged'])
+        DEDUP_LENGTH.inc(report['removed_length'])
+        changeColor.process_file(dest, dest)
+        preflight = validate.validate_file(dest)
+        for kind, problems in preflight.items():
+            if problems:
+                VALIDATION_PROBLEMS.inc(len(problems), kind=kind)
+        validate.print_report(fname, preflight)
+        validate.write_report(preflight_path(fname), fname, preflight)
+        processed.append(fname)
+    return processed
+
+def preflight_path(fname):
+    """Where post_process writes the pre-flight report of an exported DXF: colored/<name>.preflight.json."""
+    return os.path.join(COLORED_DIR, os.path.splitext(fname)[0] + '.preflight.json')
+
+def preflight_summary(processed):
+    """[(report file name, problem count)] for the processed DXFs, read back from their reports."""
+    summary = []
+    for fname in processed:
+        path = preflight_path(fname)
+        with open(path, 'r') as f:
+            summary.append((os.path.basename(path), json.load(f)['problems']))
+    return summary
+
+def _read_done_marker():
+    """Contents of DONE_JSON, or None while the script has not written it yet."""
+    try:
+        with open(DONE_JSON, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def wait_for_export(process, launched_at, dims):
+    """
+    Wait for the script's DONE_JSON marker (start_job removes the previous one)
+    and check that it is for `dims` and that every part in EXPORT_PARTS was
+    exported after `launched_at`. Returns the exported file names; raises
+    RuntimeError if the launcher or script failed, a part is missing, or no
+    marker appeared within EXPORT_TIMEOUT.
+    """
+    deadline = time.time() + EXPORT_TIMEOUT
+    while True:
+        done = _read_done_marker()
+        if done is not None:
+            break
+        if process.poll() not in (None, 0):
+            ERRORS.inc(kind='fusion_exit')
+            raise RuntimeError(f"Fusion 360 exited with code {process.returncode} without exporting.")
+        if time.time() >= deadline:
+            ERRORS.inc(kind='export_timeout')
+            raise RuntimeError(f"The export did not finish within {EXPORT_TIMEOUT} s (no {DONE_JSON}).")
+        time.sleep(POLL_INTERVAL)
+    if done.get('error'):
+        ERRORS.inc(kind='fusion_script')
+        raise RuntimeError(f"The Fusion 360 script failed: {done['error']}")
+    if done.get('dims') is None or variants.normalize(done['dims']) != variants.normalize(dims):
+        ERRORS.inc(kind='fusion_script')
+        raise RuntimeError(f"The Fusion 360 script exported {done.get('dims')} instead of {dims}.")
+    exported = sorted(done.get('exported', []))
+    missing = [p for p in EXPORT_PARTS if p not in exported
+               or not os.path.exists(os.path.join(EXPORT_DIR, p))
+               or os.path.getmtime(os.path.join(EXPORT_DIR, p)) < launched_at]
+    if missing:
+        ERRORS.inc(kind='missing_parts')
+        raise RuntimeError(f"The export is missing {', '.join(missing)} (skipped: {done.get('skipped') or '-'}).")
+    return exported
+
+def finish_job(process, launched_at, dims, timings=None):
+    """
+    Wait for the export of a launched job, then post-process it.
+    Returns the processed file names; raises RuntimeError if the job failed.
+    """
+    try:
+        with timed_stage('export', timings):
+            exported = wait_for_export(process, launched_at, dims)
+    finally:
+        FUSION_INFLIGHT.dec()
+    try:
+        with timed_stage('post_process', timings):
+            return post_process(exported)
+    except Exception as e:
+        ERRORS.inc(kind='post_process')
+        raise RuntimeError(f"Post-processing failed: {e}") from e
+
+@contextmanager
+def export_lock():
+    """
+    Cross-process lock on EXPORT_DIR, held by the job worker and by precompute.py:
+    a lock file created with O_EXCL that holds the owner's pid. Waits while
+    another process holds it.
+    """
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    while True:
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            break
+        except FileExistsError:
+            try:
+                if time.time() - os.path.getmtime(LOCK_PATH) > LOCK_STALE:
+                    print(f"Removing stale lock {LOCK_PATH}", file=sys.stderr)
+                    os.remove(LOCK_PATH)
+                    continue
+            except FileNotFoundError:
+                continue   # released between the two calls
+            time.sleep(POLL_INTERVAL)
+    with os.fdopen(fd, 'w') as f:
+        f.write(str(os.getpid()))
+    try:
+        yield
+    finally:
+        try:
+            os.remove(LOCK_PATH)
+        except FileNotFoundError:
+            pass
+
+def job_running():
+    """True while a job of this server or of precompute.py may be rewriting the outputs."""
+    return QUEUE_DEPTH.get() > 0 or os.path.exists(LOCK_PATH)
+
+def model_digest():
+    """SHA-256 of MODEL_PATH, or None if the model file is missing."""
+    if not os.path.exists(MODEL_PATH):
+        return None
+    return downloads.file_digest(MODEL_PATH)
+
+def cache_key(dims):
+    """What an export depends on: the dims and the model file's hash. None (never cached) if the model is missing."""
+    model = model_digest()
+    if model is None:
+        return None
+    return (variants.variant_id(dims), model)
+
+def _job_worker_loop():
+    """The single job worker: run queued form submissions one after another."""
+    while True:
+        dims = _job_queue.get()
+        try:
+            run_job(dims)
+        except Exception as e:
+            print(f"Job {dims} failed: {e}", file=sys.stderr)
+        finally:
+            QUEUE_DEPTH.dec()
+            _job_queue.task_done()
+
+def enqueue_job(dims):
+    """Queue a form submission for the job worker; returns the number of jobs ahead of it."""
+    global _job_worker
+    with _job_worker_lock:
+        if _job_worker is None:
+            _job_worker = threading.Thread(target=_job_worker_loop, name='fusion-jobs', daemon=True)
+            _job_worker.start()
+        ahead = int(QUEUE_DEPTH.get())
+        QUEUE_DEPTH.inc()
+        _job_queue.put(dims)
+    return ahead
+
+def start_job(dims, timings=None):
+    """
+    Write dims.json and trigger the Fusion 360 script; the caller holds _job_lock.
+    Stage durations are added to `timings`, if given. Returns (process, launched_at). Failures are counted in ERRORS and raised
+    as RuntimeError with a message fit for the form.
+    """
+    try:
+        os.makedirs(EXPORT_DIR, exist_ok=True)
+        if os.path.exists(DONE_JSON):
+            os.remove(DONE_JSON)   # the previous job's marker must not end this one
+        with timed_stage('json_write', timings):
+            with open(DIMS_JSON, 'w') as f:
+                json.dump(dims, f, indent=2)
+        # Add a small delay to ensure the file system write is complete before Fusion tries to read
+        time.sleep(0.1)
+    except Exception as e:
+        ERRORS.inc(kind='json_write')
+        raise RuntimeError(f"Error writing to {DIMS_JSON}: {e}") from e
+
+    # This runs the specified script using Fusion 360's command line; the script
+    # itself operates on the active document. Popen does not wait for Fusion.
+    # Output is discarded: completion is detected from the exported files,
+    # and nobody reads the pipes, which could fill up and block Fusion.
+    launched_at = time.time()
+    try:
+        with timed_stage('launch', timings):
+            process = subprocess.Popen([FUSION_PATH, '/runscript', SCRIPT_PATH], shell=False,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    except FileNotFoundError as e:
+        ERRORS.inc(kind='fusion_not_found')
+        raise RuntimeError(f"Error: Fusion 360 executable not found at '{FUSION_PATH}'. "
+                           f"Please check FUSION_PATH configuration in app.py.") from e
+    except Exception as e:
+        ERRORS.inc(kind='launch')
+        raise RuntimeError(f"An unexpected error occurred while trying to trigger Fusion 360 script: {e}. "
+                           f"Check FUSION_PATH and SCRIPT_PATH in app.py.") from e
+    FUSION_INFLIGHT.inc()
+    return process, launched_at
+
+def run_job(dims, then=None):
+    """
+    Export and post-process one set of dims, blocking until done. The job worker
+    runs form submissions through here; precompute.py calls it directly and
+    passes `then`, which is called with the processed file names while the
+    outputs are still locked. Outputs land in EXPORT_DIR / COLORED_DIR.
+    Returns the processed file names, or what `then` returns.
+    """
+    global _last_job
+    with _job_lock, export_lock():
+        key, timings = cache_key(dims), {}
+        try:
+            process, launched_at = start_job(dims, timings)
+            processed = finish_job(process, launched_at, dims, timings)
+            result = then(processed) if then else processed
+        except Exception as e:
+            _last_job = {'dims': dims, 'key': None, 'ok': False, 'message': str(e), 'timings': timings,
+                         'finished': time.strftime('%H:%M:%S')}
+            raise
+        _last_job = {'dims': dims, 'key': key, 'ok': True,
+                     'message': f"Exported and post-processed {len(processed)} file(s).",
+                     'preflight': preflight_summary(processed),
+                     'dims_file': downloads.file_digest(DIMS_JSON),
+                     'timings': timings,
+                     'finished': time.strftime('%H:%M:%S')}
+        return result
+
+@app.route('/metrics')
+def metrics_endpoint():
+    return Response(metrics.render(), content_type=metrics.CONTENT_TYPE)
+
+# --- Output downloads ---
+def output_manifest():
+    """Archive name -> path for the current job's raw DXFs, colored DXFs, pre-flight reports and SVGs."""
+    return downloads.build_manifest([
+        ('raw',     EXPORT_DIR,  ('.dxf',)),
+        ('colored', COLORED_DIR, ('.dxf', '.preflight.json')),
+        ('svg',     EXPORT_DIR,  ('.svg',)),
+    ])
+
+def _job_busy_response():
+    # Outputs are being rewritten; a download now could mix two jobs.
+    response = jsonify(error="An export job is still running. Retry shortly.")
+    response.status_code = 503
+    response.headers['Retry-After'] = '10'
+    return response
+
+def _not_modified(etag):
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+@app.route('/download')
+def download_bundle():
+    """Stream every output of the current job as a zip, or 304 if the client already has it."""
+    if job_running():
+        return _job_busy_response()
+    manifest = output_manifest()
+    if not manifest:
+        return jsonify(error="No export outputs found."), 404
+    etag = downloads.manifest_etag(manifest, DIMS_JSON)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    response = Response(stream_with_context(downloads.stream_zip(manifest)), mimetype='application/zip')
+    response.set_etag(etag)
+    response.headers['Content-Disposition'] = f'attachment; filename="export-{etag[:12]}.zip"'
+    return response
+
+@app.route('/download/<path:name>')
+def download_file(name):
+    """Stream one output (e.g. colored/Top_flat.dxf or colored/Top_flat.preflight.json), gzip-encoded when the client accepts it."""
+    if job_running():
+        return _job_busy_response()
+    path = output_manifest().get(name)   # only listed outputs, so no path traversal
+    if path is None:
+        return jsonify(error=f"No output named '{name}'."), 404
+    use_gzip = request.accept_encodings['gzip'] > 0
+    # Strong ETags must differ per encoding, since the bytes on the wire differ.
+    etag = downloads.file_digest(path)[:32] + ('-gz' if use_gzip else '')
+    if request.if_none_match.contains(etag):
+        response = _not_modified(etag)
+    else:
+        body = downloads.stream_gzip(path) if use_gzip else downloads.stream_file(path)
+        mimetype = {'.svg': 'image/svg+xml', '.json': 'application/json'}.get(
+            os.path.splitext(name)[1].lower(), 'application/dxf')
+        response = Response(stream_with_context(body), mimetype=mimetype)
+        response.set_etag(etag)
+        response.headers['Content-Disposition'] = f'attachment; filename="{os.path.basename(path)}"'
+        if use_gzip:
+            response.headers['Content-Encoding'] = 'gzip'
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+# --- Precomputed variants ---
+def variant_index():
+    """
+    The current VariantIndex, holding only variants exported from the current
+    model; reloaded when precompute.py has updated it or the model changed.
+    """
+    global _variant_index, _variant_index_version
+    path = variants.index_path()
+    version = (os.path.getmtime(path) if os.path.exists(path) else None, model_digest())
+    with _variant_lock:
+        if _variant_index is None or version != _variant_index_version:
+            _variant_index = variants.VariantIndex.load(model=version[1])
+            _variant_index_version = version
+        return _variant_index
+
+def _dims_from_args():
+    """Dims from the query string; raises ValueError if any is missing or malformed."""
+    try:
+        dims = variants.normalize({k: request.args[k] for k in variants.DIM_KEYS})
+    except KeyError as e:
+        raise ValueError(f"Missing parameter {e.args[0]}.")
+    variants.check_dims(dims)
+    return dims
+
+def _variant_json(record):
+    fields = ('id', 'dims', 'cut_length', 'sheet_area', 'hole_count')
+    return dict({k: record[k] for k in fields}, download=f"/variants/{record['id']}/download")
+
+@app.route('/variants/lookup')
+def variant_lookup():
+    """Exact precomputed variant for the given dims, without running Fusion."""
+    try:
+        dims = _dims_from_args()
+    except ValueError as e:
+        ERRORS.inc(kind='invalid_input')
+        return jsonify(error=str(e)), 400
+    record = variant_index().get(dims)
+    if record is None:
+        CACHE_MISSES.inc(source='variants')
+        return jsonify(error="Variant not precomputed.", dims=dims), 404
+    CACHE_HITS.inc(source='variants')
+    return jsonify(_variant_json(record))
+
+@app.route('/variants/nearest')
+def variant_nearest():
+    """Nearest precomputed variant; add fit=1 to only accept sizes at least as large as requested."""
+    try:
+        dims = _dims_from_args()
+    except ValueError as e:
+        ERRORS.inc(kind='invalid_input')
+        return jsonify(error=str(e)), 400
+    fit = request.args.get('fit', '0').lower() in ('1', 'true', 'yes')
+    record = variant_index().nearest(dims, fit=fit)
+    if record is None:
+        CACHE_MISSES.inc(source='variants')
+        return jsonify(error="No precomputed variant matches.", dims=dims), 404
+    CACHE_HITS.inc(source='variants')
+    return jsonify(dict(_variant_json(record), requested=dims, exact=record['dims'] == dims))
+
+@app.route('/variants/<vid>/download')
+def variant_download(vid):
+    """Zip of a stored variant; the ETag is derived from the hashes of its stored files."""
+    record = variant_index().by_id(vid)
+    if record is None:
+        return jsonify(error=f"No variant '{vid}'."), 404
+    etag = variants.record_etag(record)
+    if request.if_none_match.contains(etag):
+        return _not_modified(etag)
+    manifest = {name: variants.object_path(sha) for name, sha in record['files'].items()}
+    response = Response(stream_with_context(downloads.stream_zip(manifest)), mimetype='application/zip')
+    response.set_etag(etag)
+    response.headers['Content-Disposition'] = f'attachment; filename="variant-{vid}.zip"'
+    return response
+
 @app.route('/', methods=['GET', 'POST'])
 def index():
     message = None
@@ -119,80 +667,43 @@ def index():
                 'Height': height
             }
 
-            # Ensure export directory exists
-            try:
-                os.makedirs(EXPORT_DIR, exist_ok=True)
-            except Exception as dir_e:
-                 message = f"Error creating export directory {EXPORT_DIR}: {dir_e}"
-                 message_type = "error"
-                 # Continue, as directory might exist, but report the issue.
-
-
-            # Write updated dimensions to JSON file
-            try:
-                with open(DIMS_JSON, 'w') as f:
-                    json.dump(new_dims, f, indent=2)
-                # Add a small delay to ensure the file system write is complete before Fusion tries to read
-                time.sleep(0.1)
-            except Exception as json_e:
-                 message = f"Error writing to {DIMS_JSON}: {json_e}"
-                 message_type = "error"
-                 # Can't proceed if JSON write fails, return early
-                 return render_template_string(HTML_FORM, message=message, message_type=message_type, export_dir=EXPORT_DIR)
-
-
-            # --- Trigger Fusion 360 Script ---
-            # This attempts to run the specified script using Fusion 360's command line.
-            # The script itself MUST be designed to handle the file (either open it
-            # or operate on the active document, like the simplified version).
-            try:
-                command = [
-                    FUSION_PATH,
-                    '/runscript', # Command-line argument to run a script
-                    SCRIPT_PATH   # Full path to the Python script file
-                ]
-
-                # Use subprocess.Popen to run the command in the background.
-                # This means the web server's response is sent back immediately,
-                # and Fusion 360 runs the script separately.
-                # shell=False is generally safer than shell=True.
-                process = subprocess.Popen(
-                    command,
-                    shell=False,
-                    stdout=subprocess.PIPE, # Capture stdout (for debugging script output if needed)
-                    stderr=subprocess.PIPE, # Capture stderr
-                    # start_new_session=True # Can sometimes help detach the process on Windows
-                )
-
-                # Give the command a brief moment to register, though Popen is non-blocking
-                time.sleep(0.5)
-
-                # Set success message if trigger command was sent without FileNotFoundError
-                # Check if an error message was already set (e.g., from directory creation)
-                if message_type != "error":
-                    message = "Parameters updated and script trigger sent to Fusion 360."
-                    message_type = "success"
-                export_dir_display = EXPORT_DIR
-
-            except FileNotFoundError:
-                 message = f"Error: Fusion 360 executable not found at '{FUSION_PATH}'. Please check FUSION_PATH configuration in app.py."
-                 message_type = "error"
-            except Exception as trigger_e:
-                 message = f"An unexpected error occurred while trying to trigger Fusion 360 script: {trigger_e}. Check FUSION_PATH and SCRIPT_PATH in app.py."
-                 message_type = "error"
+            # Answer from the existing outputs if the last job succeeded with these dims on the
+            # same model, nothing (here or in precompute.py) has rewritten dims.json since and
+            # nothing is about to overwrite them, unless a re-run is forced
+            force = request.form.get('force') == '1'
+            last, key = _last_job, cache_key(new_dims)
+            if (not force and key is not None and last and last['ok'] and last['key'] == key
+                    and not job_running() and outputs_present()
+                    and os.path.exists(DIMS_JSON) and downloads.file_digest(DIMS_JSON) == last['dims_file']):
+                CACHE_HITS.inc(source='form')
+                message = "Outputs for these parameters are already up to date; Fusion 360 was not re-run."
+                message_type = "success"
+                return render_template_string(HTML_FORM, message=message, message_type=message_type,
+                                              export_dir=EXPORT_DIR, last_job=_last_job)
+            CACHE_MISSES.inc(source='form')
 
+            # Jobs share dims.json, so the single job worker runs them one at a time.
+            ahead = enqueue_job(new_dims)
+            message = "Parameters queued; the script trigger is sent to Fusion 360 when the job starts."
+            if ahead:
+                message += f" {ahead} job(s) ahead of it."
+            message_type = "success"
+            export_dir_display = EXPORT_DIR
 
         except ValueError:
             # This catches errors if form data cannot be converted to int or float
+            ERRORS.inc(kind='invalid_input')
             message = "Invalid input received. Please ensure you are entering numbers."
             message_type = "error"
         except Exception as e:
             # Catch any other unexpected errors during form processing or JSON writing
+            ERRORS.inc(kind='unexpected')
             message = f"An unexpected error occurred during processing: {e}"
             message_type = "error"
 
     # Render the form, displaying messages if any occurred
-    return render_template_string(HTML_FORM, message=message, message_type=message_type, export_dir=export_dir_display)
+    return render_template_string(HTML_FORM, message=message, message_type=message_type, export_dir=export_dir_display,
+                                  last_job=_last_job)
 
 if __name__ == '__main__':
     # Run the Flask development server.
@@ -206,5 +717,8 @@ if __name__ == '__main__':
     print(f" EXPORT_DIR: {EXPORT_DIR}")
     print(f" FUSION_PATH: {FUSION_PATH}")
     print(f" SCRIPT_PATH: {SCRIPT_PATH}")
+    print(f"Metrics (Prometheus format): http://localhost:5000/metrics")
+    print(f"Download outputs (zip):      http://localhost:5000/download")
+    print(f"Precomputed variants:        http://localhost:5000/variants/nearest?Length=..&Width=..&Height=..&Length_Screws=..&Width_Screws=..")
 
     app.run(debug=True, port=5000, host='localhost')
\ No newline at end of file
@@ -0,0 +1,283 @@
+import ezdxf
+import math
+import os
+
+# ─────────────── CONFIGURATION ───────────────
+SOURCE_DIR    = os.getcwd()                        # Folder with original DXFs
+DEST_DIR      = os.path.join(SOURCE_DIR, 'deduped')
+TOLERANCE     = 1e-3    # mm; coordinates closer than this are the same point
+ANGLE_TOL     = 1e-6    # rad; directions closer than this are the same line
+# ────────────────────────────────────────────────
+
+def q(value, tol=TOLERANCE):
+    """Quantize a coordinate/length onto a grid of size `tol`."""
+    return round(value / tol)
+
+def q_point(pt, tol=TOLERANCE):
+    return (q(pt[0], tol), q(pt[1], tol))
+
+# ─────────────── canonical keys ───────────────
+# Two entities with the same key cut exactly the same path.
+
+def segment_key(p1, p2, tol=TOLERANCE):
+    """Direction-independent key of a straight segment."""
+    a, b = q_point(p1, tol), q_point(p2, tol)
+    return ('LINE',) + (a + b if a <= b else b + a)
+
+def circle_key(center, radius, tol=TOLERANCE):
+    return ('CIRCLE',) + q_point(center, tol) + (q(radius, tol),)
+
+def arc_key(center, radius, start_angle, end_angle, tol=TOLERANCE):
+    """DXF arcs always run counter-clockwise, so only the angles need normalizing."""
+    angle_q = math.degrees(ANGLE_TOL)
+    return ('ARC',) + q_point(center, tol) + (q(radius, tol),
+            q(start_angle % 360.0, angle_q), q(end_angle % 360.0, angle_q))
+
+def least_rotation(seq):
+    """Start index of the lexicographically smallest rotation of `seq` (Booth's algorithm, O(n))."""
+    doubled = seq + seq
+    fail = [-1] * len(doubled)
+    k = 0
+    for j in range(1, len(doubled)):
+        item, i = doubled[j], fail[j - k - 1]
+        while i != -1 and item != doubled[k + i + 1]:
+            if item < doubled[k + i + 1]:
+                k = j - i - 1
+            i = fail[i]
+        if item != doubled[k + i + 1]:          # i == -1
+            if item < doubled[k]:
+                k = j
+            fail[j - k] = -1
+        else:
+            fail[j - k] = i + 1
+    return k
+
+def polyline_key(points, closed, tol=TOLERANCE):
+    """
+    Key of an LWPOLYLINE given as (x, y, bulge) tuples, independent of the
+    start vertex (closed loops) and of the direction of travel. Reversing a
+    polyline moves each bulge onto the mirrored edge and flips its sign.
+    """
+    n = len(points)
+    if n < 2:
+        return ('LWPOLYLINE', closed, tuple(q_point(p, tol) for p in points))
+    verts = [q_point(p, tol) for p in points]
+    bulges = [q(p[2], tol) for p in points]
+    edge_count = n if closed else n - 1
+    forward = [(verts[i], verts[(i + 1) % n], bulges[i]) for i in range(edge_count)]
+    backward = [(b, a, -bulge) for a, b, bulge in reversed(forward)]
+    if closed:
+        candidates = []
+        for seq in (forward, backward):
+            k = least_rotation(seq)
+            candidates.append(seq[k:] + seq[:k])
+    else:
+        candidates = [forward, backward]
+    return ('LWPOLYLINE', closed, tuple(min(candidates)))
+
+# ─────────────── lengths ───────────────
+
+def segment_length(p1, p2):
+    return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+
+def arc_length(radius, start_angle, end_angle):
+    sweep = (end_angle - start_angle) % 360.0
+    return math.radians(sweep or 360.0) * radius
+
+def bulge_length(p1, p2, bulge):
+    """Length of one LWPOLYLINE edge; bulge = tan(sweep / 4)."""
+    chord = segment_length(p1, p2)
+    if abs(bulge) < 1e-12 or chord == 0:
+        return chord
+    sweep = 4 * math.atan(abs(bulge))
+    return chord * sweep / (2 * math.sin(sweep / 2))
+
+def polyline_length(points, closed):
+    n = len(points)
+    edges = n if closed else n - 1
+    return sum(bulge_length(points[i], points[(i + 1) % n], points[i][2]) for i in range(edges))
+
+# ─────────────── collinear overlap sweep ───────────────
+
+def line_group_key(p1, p2, tol=TOLERANCE):
+    """
+    Bucket of the infinite line through a segment (quantized angle and offset),
+    plus the segment's own unit direction, oriented so the angle lies in
+    [0, pi). Using the exact direction keeps the offset constant along a line;
+    lines within tolerance can still straddle two buckets, so merge_collinear
+    also looks at the neighbouring ones.
+    """
+    half_turn = round(math.pi / ANGLE_TOL)
+    length = segment_length(p1, p2)
+    dx, dy = (p2[0] - p1[0]) / length, (p2[1] - p1[1]) / length
+    if dy < 0 or (dy == 0 and dx < 0):
+        dx, dy = -dx, -dy
+    k = round(math.atan2(dy, dx) / ANGLE_TOL)
+    if k >= half_turn:                       # within ANGLE_TOL of pi: same bucket as angle 0
+        k -= half_turn
+        dx, dy = -dx, -dy
+    offset = dx * p1[1] - dy * p1[0]         # signed distance from the origin
+    return (k, q(offset, tol)), (dx, dy)
+
+def _neighbour_keys(key):
+    """The 3 x 3 angle/offset buckets around `key`; across the 0/pi seam the direction, and so the offset, flips."""
+    half_turn = round(math.pi / ANGLE_TOL)
+    k, o = key
+    for dk in (-1, 0, 1):
+        k2, sign = k + dk, 1
+        if not 0 <= k2 < half_turn:
+            k2, sign = k2 % half_turn, -1
+        for do in (-1, 0, 1):
+            yield (k2, sign * o + do)
+
+def _on_line(pt, origin, direction, tol):
+    return abs((pt[0] - origin[0]) * direction[1] - (pt[1] - origin[1]) * direction[0]) <= tol
+
+def _collinear(s, t, tol=TOLERANCE):
+    """True if each segment's endpoints lie within `tol` of the other's line."""
+    ds, dt = line_group_key(*s, tol)[1], line_group_key(*t, tol)[1]
+    return (all(_on_line(p, s[0], ds, tol) for p in t) and
+            all(_on_line(p, t[0], dt, tol) for p in s))
+
+def merge_collinear(segments, tol=TOLERANCE):
+    """
+    Merge overlapping segments that lie on a common line.
+    `segments` is a list of ((x1, y1), (x2, y2)). Returns (merged, removed_length)
+    where `merged` is a list of (indices, start, end): the input segments in one
+    overlapping run and the single segment that replaces them. Runs without any
+    overlap (disjoint or merely touching segments) are left alone.
+    """
+    buckets = {}
+    for i, (p1, p2) in enumerate(segments):
+        if segment_length(p1, p2) <= tol:
+            continue
+        buckets.setdefault(line_group_key(p1, p2, tol)[0], []).append(i)
+
+    # Join neighbouring buckets whose lines really coincide (checked on one member of each).
+    parent = {key: key for key in buckets}
+
+    def find(key):
+        while parent[key] != key:
+            parent[key] = parent[parent[key]]
+            key = parent[key]
+        return key
+
+    for key, members in buckets.items():
+        for other in _neighbour_keys(key):
+            if other != key and other in buckets and find(other) != find(key) \
+                    and _collinear(segments[members[0]], segments[buckets[other][0]], tol):
+                parent[find(other)] = find(key)
+    groups = {}
+    for key, members in buckets.items():
+        groups.setdefault(find(key), []).extend(members)
+
+    merged, removed = [], 0.0
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        dx, dy = line_group_key(*segments[members[0]], tol)[1]
+        ox, oy = segments[members[0]][0]      # project onto the line through here
+        intervals = []
+        for i in members:
+            (t0, a), (t1, b) = sorted(((x - ox) * dx + (y - oy) * dy, (x, y)) for x, y in segments[i])
+            intervals.append((t0, t1, i, a, b))
+        intervals.sort()
+
+        # Sweep in order of start parameter, growing the current run while the
+        # next interval begins before the run ends. Merged endpoints are taken
+        # from the input so they still match neighbours exactly.
+        run = []
+        for start, end, i, a, b in intervals + [(math.inf, math.inf, None, None, None)]:
+            if run and start < run_end - tol:
+                run.append(i)
+                covered += end - start
+                if end > run_end:
+                    run_end, end_pt = end, b
+                continue
+            if len(run) > 1:
+                overlap = covered - (run_end - run_start)
+                if overlap > tol:
+                    merged.append((run, start_pt, end_pt))
+                    removed += overlap
+            run, covered = [i], end - start
+            run_start, run_end, start_pt, end_pt = start, end, a, b
+    return merged, removed
+
+# ─────────────── DXF processing ───────────────
+
+def _entity_key_and_length(e):
+    kind = e.dxftype()
+    if kind == 'LINE':
+        p1, p2 = (e.dxf.start.x, e.dxf.start.y), (e.dxf.end.x, e.dxf.end.y)
+        return segment_key(p1, p2), segment_length(p1, p2)
+    if kind == 'CIRCLE':
+        r = e.dxf.radius
+        return circle_key((e.dxf.center.x, e.dxf.center.y), r), 2 * math.pi * r
+    if kind == 'ARC':
+        r, a0, a1 = e.dxf.radius, e.dxf.start_angle, e.dxf.end_angle
+        return arc_key((e.dxf.center.x, e.dxf.center.y), r, a0, a1), arc_length(r, a0, a1)
+    points = [tuple(p) for p in e.get_points('xyb')]
+    return polyline_key(points, e.closed), polyline_length(points, e.closed)
+
+def entity_length(e):
+    """Cut length (mm) of a LINE, ARC, CIRCLE or LWPOLYLINE."""
+    return _entity_key_and_length(e)[1]
+
+def dedupe_modelspace(msp, tol=TOLERANCE):
+    """
+    Remove exact duplicates and merge collinear overlapping LINEs in place.
+    Returns a report dict: duplicates removed, overlapping lines merged and
+    the cut length (mm) that no longer has to be cut twice.
+    """
+    report = {'duplicates': 0, 'merged': 0, 'removed_length': 0.0}
+
+    # 1) exact duplicates, by hashed canonical geometry
+    seen = set()
+    for e in list(msp.query('LINE ARC CIRCLE LWPOLYLINE')):
+        key, length = _entity_key_and_length(e)
+        if key in seen:
+            msp.delete_entity(e)
+            report['duplicates'] += 1
+            report['removed_length'] += length
+        else:
+            seen.add(key)
+
+    # 2) partial overlaps between the remaining LINEs
+    lines = list(msp.query('LINE'))
+    segments = [((l.dxf.start.x, l.dxf.start.y), (l.dxf.end.x, l.dxf.end.y)) for l in lines]
+    merged, removed = merge_collinear(segments, tol)
+    for indices, start, end in merged:
+        keep = lines[indices[0]]
+        keep.dxf.start = (start[0], start[1], 0)
+        keep.dxf.end   = (end[0], end[1], 0)
+        for i in indices[1:]:
+            msp.delete_entity(lines[i])
+        report['merged'] += len(indices) - 1
+    report['removed_length'] += removed
+    return report
+
+def process_file(src_path, dest_path, tol=TOLERANCE):
+    print(f"Deduplicating '{os.path.basename(src_path)}'…")
+    doc = ezdxf.readfile(src_path)
+    report = dedupe_modelspace(doc.modelspace(), tol)
+    print(f"  removed {report['duplicates']} duplicate(s), merged {report['merged']} overlapping line(s), "
+          f"{report['removed_length']:.3f} mm less cutting")
+    doc.saveas(dest_path)
+    return report
+
+def main():
+    os.makedirs(DEST_DIR, exist_ok=True)
+    total = 0.0
+    for fname in os.listdir(SOURCE_DIR):
+        if not fname.lower().endswith('.dxf'):
+            continue
+        src_file  = os.path.join(SOURCE_DIR, fname)
+        dest_file = os.path.join(DEST_DIR, fname)
+        try:
+            total += process_file(src_file, dest_file)['removed_length']
+        except Exception as e:
+            print(f"  ⚠️ Error processing '{fname}': {e}")
+    print(f"Done. Removed {total:.3f} mm of duplicated cut length.")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+# downloads.py
+# Helpers used by app.py to hand a job's output files to remote clients:
+# a manifest of what exists, a content-derived ETag, and streaming zip / gzip
+# bodies that are produced chunk by chunk without touching the disk.
+
+import hashlib
+import os
+import threading
+import zipfile
+import zlib
+
+# ─────────────── CONFIGURATION ───────────────
+CHUNK_SIZE      = 64 * 1024   # bytes read from disk per step
+GZIP_LEVEL      = 6           # zlib level for on-the-fly gzip of single files
+ZIP_LEVEL       = 6           # deflate level inside the zip bundle
+# ────────────────────────────────────────────────
+
+_digest_lock  = threading.Lock()
+_digest_cache = {}   # path -> ((mtime_ns, size), sha256 hex)
+
+
+def file_digest(path):
+    """SHA-256 of a file, cached until its mtime or size changes."""
+    st  = os.stat(path)
+    sig = (st.st_mtime_ns, st.st_size)
+    with _digest_lock:
+        cached = _digest_cache.get(path)
+    if cached and cached[0] == sig:
+        return cached[1]
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            h.update(chunk)
+    with _digest_lock:
+        _digest_cache[path] = (sig, h.hexdigest())
+    return h.hexdigest()
+
+
+def build_manifest(sources):
+    """
+    Map archive names to files on disk.
+    `sources` is a list of (prefix, directory, suffixes) tuples, e.g.
+    [('raw', EXPORT_DIR, ('.dxf',))]; every matching file directly inside a
+    directory becomes '<prefix>/<file name>'.
+    """
+    manifest = {}
+    for prefix, directory, suffixes in sources:
+        if not os.path.isdir(directory):
+            continue
+        for fname in sorted(os.listdir(directory)):
+            path = os.path.join(directory, fname)
+            if fname.lower().endswith(suffixes) and os.path.isfile(path):
+                manifest[f'{prefix}/{fname}'] = path
+    return manifest
+
+
+def manifest_etag(manifest, dims_path=None):
+    """Strong ETag over the job dims (if given) and the name + content hash of every output."""
+    h = hashlib.sha256()
+    if dims_path and os.path.exists(dims_path):
+        h.update(b'dims\0' + file_digest(dims_path).encode())
+    for arcname in sorted(manifest):
+        h.update(f'{arcname}\0{file_digest(manifest[arcname])}\n'.encode())
+    return h.hexdigest()[:32]
+
+
+class _ChunkSink:
+    """Write-only, non-seekable file object that hands written bytes back to a generator."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data, self._chunks = b''.join(self._chunks), []
+        return data
+
+
+def stream_zip(manifest):
+    """Yield a deflated zip of every file in `manifest`, built as it is sent."""
+    sink = _ChunkSink()
+    # zipfile falls back to data descriptors when the target cannot seek,
+    # so nothing is buffered beyond the current chunk.
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=ZIP_LEVEL) as zf:
+        for arcname in sorted(manifest):
+            with open(manifest[arcname], 'rb') as src, zf.open(arcname, 'w') as dest:
+                for chunk in iter(lambda: src.read(CHUNK_SIZE), b''):
+                    dest.write(chunk)
+                    data = sink.drain()
+                    if data:
+                        yield data
+            data = sink.drain()
+            if data:
+                yield data
+    yield sink.drain()
+
+
+def stream_gzip(path):
+    """Yield `path` gzip-compressed (RFC 1952), chunk by chunk."""
+    comp = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            data = comp.compress(chunk)
+            if data:
+                yield data
+    yield comp.flush()
+
+
+def stream_file(path):
+    """Yield `path` unchanged, chunk by chunk."""
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b'')
@@ -0,0 +1,178 @@
+# metrics.py
+# Minimal in-process metrics registry rendered in the Prometheus text format.
+# Used by app.py to expose /metrics without pulling in prometheus_client.
+
+import threading
+
+# ─────────────── CONFIGURATION ───────────────
+# Histogram buckets in seconds. Fusion recomputes take from a few seconds to
+# several minutes, so the upper buckets are deliberately wide.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10,
+                   30, 60, 120, 300, 600)
+# ────────────────────────────────────────────────
+
+_lock = threading.Lock()
+_metrics = []   # registration order == output order
+
+
+def _escape(value):
+    return str(value).replace('\\', r'\\').replace('\n', r'\n').replace('"', r'\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{_escape(extra[1])}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, doc, labels=()):
+        self.name   = name
+        self.doc    = doc
+        self.labels = tuple(labels)
+        self._values = {}
+        with _lock:
+            _metrics.append(self)
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} expects labels {self.labels}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labels)
+
+    def render(self):
+        lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} {self.kind}']
+        with _lock:
+            items = sorted(self._values.items())
+        if not items and not self.labels:
+            items = [((), self._zero())]
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _zero(self):
+        return 0.0
+
+    def _render_sample(self, key, value):
+        return [f'{self.name}{_format_labels(self.labels, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Monotonically increasing count, e.g. requests or errors."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase.")
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def get(self, **labels):
+        with _lock:
+            return self._values.get(self._key(labels), 0.0)
+
+
+class Gauge(_Metric):
+    """Value that can go up and down, e.g. queue depth."""
+    kind = 'gauge'
+
+    def __init__(self, name, doc, labels=(), func=None):
+        super().__init__(name, doc, labels)
+        # Optional callable evaluated at scrape time. With labels it returns
+        # {label values tuple: value}, one entry per series.
+        self._func = func
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with _lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def get(self, **labels):
+        if self._func is not None and self.labels:
+            return float(self._func().get(self._key(labels), 0.0))
+        if self._func is not None:
+            return float(self._func())
+        with _lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def render(self):
+        if self._func is not None and self.labels:
+            lines = [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} {self.kind}']
+            for key, value in sorted(self._func().items()):
+                lines.extend(self._render_sample(tuple(str(v) for v in key), value))
+            return lines
+        if self._func is not None:
+            return [f'# HELP {self.name} {self.doc}', f'# TYPE {self.name} {self.kind}',
+                    f'{self.name} {_format_value(self._func())}']
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Cumulative bucketed observations, e.g. stage latencies in seconds."""
+    kind = 'histogram'
+
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+
+    def _zero(self):
+        return [[0] * len(self.buckets), 0.0, 0]   # bucket counts, sum, count
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with _lock:
+            state = self._values.setdefault(key, self._zero())
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += value
+            state[2] += 1
+
+    def touch(self, **labels):
+        """Create an empty series so it is exported before the first observation."""
+        key = self._key(labels)
+        with _lock:
+            self._values.setdefault(key, self._zero())
+
+    def _render_sample(self, key, value):
+        counts, total, count = value
+        lines = []
+        for bound, n in zip(self.buckets, counts):
+            labels = _format_labels(self.labels, key, ('le', _format_value(bound)))
+            lines.append(f'{self.name}_bucket{labels} {n}')
+        labels = _format_labels(self.labels, key)
+        lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+        lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+def render():
+    """Return every registered metric in the Prometheus text exposition format."""
+    with _lock:
+        metrics = list(_metrics)
+    lines = []
+    for metric in metrics:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
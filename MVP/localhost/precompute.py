@@ -0,0 +1,141 @@
+# precompute.py
+# Batch-export a grid of box variants through the same pipeline as app.py
+# (dims.json -> Fusion 360 -> dedupe/color/pre-flight) and file the results
+# in the content-addressed store described in variants.py.
+#
+# Example:
+#   python precompute.py --length 200:600:100 --width 200:400:100 --height 100:200:50 \
+#                        --length-screws 2:6 --width-screws 2:6
+#
+# Fusion 360 must be running with the box design active, exactly as for the
+# web form. The form may be used meanwhile: both take app.export_lock() for the
+# whole job, so their dims.json writes and exports take turns.
+
+import argparse
+import itertools
+import json
+import math
+import os
+import sys
+import time
+
+import ezdxf
+
+import app
+import changeColor
+import dedupe
+import validate
+import variants
+
+def parse_range(text, cast):
+    """'start:stop[:step]' (inclusive) or a single value -> list of values."""
+    parts = [cast(p) for p in text.split(':')]
+    if len(parts) == 1:
+        return parts
+    start, stop = parts[0], parts[1]
+    step = parts[2] if len(parts) > 2 else cast(1)
+    if step <= 0 or stop < start:
+        raise argparse.ArgumentTypeError(f"bad range '{text}'")
+    count = int(math.floor((stop - start) / step + 1e-9)) + 1
+    return [start + i * step for i in range(count)]
+
+def part_metadata(path):
+    """Cut length (mm), bounding-box sheet area (mm²) and hole count of one colored DXF."""
+    msp = ezdxf.readfile(path).modelspace()
+    cut_length = sum(dedupe.entity_length(e) for e in msp.query('LINE ARC CIRCLE LWPOLYLINE'))
+    points = [pt for _, pts, _ in validate.contours_from_modelspace(msp) for pt in pts]
+    if points:
+        xs, ys = [p[0] for p in points], [p[1] for p in points]
+        sheet_area = float((max(xs) - min(xs)) * (max(ys) - min(ys)))
+    else:
+        sheet_area = 0.0
+    # changeColor puts circles and every non-outer closed loop on the inner layer
+    holes = len(msp.query('CIRCLE')) + sum(
+        1 for pl in msp.query('LWPOLYLINE') if pl.closed and pl.dxf.layer == changeColor.LAYER_INNER)
+    return {'cut_length': cut_length, 'sheet_area': sheet_area, 'hole_count': holes}
+
+def check_outputs(dims, processed):
+    """
+    Raise RuntimeError unless the outputs on disk belong to this job: dims.json
+    still holds `dims`, every part in app.EXPORT_PARTS was processed, and every
+    raw DXF was exported after dims.json was written and post-processed after that.
+    """
+    missing = [p for p in app.EXPORT_PARTS if p not in processed]
+    if missing:
+        raise RuntimeError(f"Missing parts: {', '.join(missing)}.")
+    with open(app.DIMS_JSON, 'r') as f:
+        if variants.normalize(json.load(f)) != variants.normalize(dims):
+            raise RuntimeError(f"{app.DIMS_JSON} no longer holds these dims.")
+    written = os.path.getmtime(app.DIMS_JSON)
+    for fname in processed:
+        raw, colored = os.path.join(app.EXPORT_DIR, fname), os.path.join(app.COLORED_DIR, fname)
+        if os.path.getmtime(raw) < written or os.path.getmtime(colored) < os.path.getmtime(raw):
+            raise RuntimeError(f"'{fname}' is not from this export.")
+
+def store_variant(dims, processed, model, store_dir=variants.STORE_DIR):
+    """Copy one finished job's raw and colored DXFs and pre-flight reports into the store and build its index record."""
+    check_outputs(dims, processed)
+    files, totals = {}, {'cut_length': 0.0, 'sheet_area': 0.0, 'hole_count': 0}
+    for fname in processed:
+        colored = os.path.join(app.COLORED_DIR, fname)
+        files[f'raw/{fname}']     = variants.put_object(os.path.join(app.EXPORT_DIR, fname), store_dir)
+        files[f'colored/{fname}'] = variants.put_object(colored, store_dir)
+        report = app.preflight_path(fname)
+        files[f'colored/{os.path.basename(report)}'] = variants.put_object(report, store_dir)
+        for k, v in part_metadata(colored).items():
+            totals[k] += v
+    totals['cut_length'] = round(totals['cut_length'], 3)
+    totals['sheet_area'] = round(totals['sheet_area'], 1)
+    return {'id': variants.variant_id(dims), 'dims': variants.normalize(dims), 'model': model,
+            'files': files, **totals, 'created': time.strftime('%Y-%m-%dT%H:%M:%S')}
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Precompute box variants into the variant store.")
+    parser.add_argument('--length',        required=True, type=lambda t: parse_range(t, float), help="mm, start:stop[:step]")
+    parser.add_argument('--width',         required=True, type=lambda t: parse_range(t, float), help="mm, start:stop[:step]")
+    parser.add_argument('--height',        required=True, type=lambda t: parse_range(t, float), help="mm, start:stop[:step]")
+    parser.add_argument('--length-screws', required=True, type=lambda t: parse_range(t, int),   help="start:stop[:step]")
+    parser.add_argument('--width-screws',  required=True, type=lambda t: parse_range(t, int),   help="start:stop[:step]")
+    parser.add_argument('--store', default=variants.STORE_DIR, help="store directory (default: %(default)s)")
+    parser.add_argument('--force', action='store_true', help="re-export variants already in the index")
+    args = parser.parse_args(argv)
+
+    grid = [dict(zip(variants.DIM_KEYS, combo)) for combo in itertools.product(
+        args.length, args.width, args.height, args.length_screws, args.width_screws)]
+    for dims in grid:
+        try:
+            variants.check_dims(dims)
+        except ValueError as e:
+            parser.error(f"{e} (got {dims})")
+
+    model = app.model_digest()
+    if model is None:
+        parser.error(f"model file not found at {app.MODEL_PATH}; set MODEL_PATH in app.py")
+    records = {r['id']: r for r in variants.load_records(args.store)}
+    current = {vid for vid, r in records.items() if r.get('model') == model}
+    todo = [d for d in grid if args.force or variants.variant_id(d) not in current]
+    stale = sum(1 for d in todo if variants.variant_id(d) in records)
+    print(f"{len(grid)} variant(s) requested, {len(grid) - len(todo)} already stored, {len(todo)} to export"
+          f" ({stale} stored from an older model).")
+
+    failed = 0
+    for n, dims in enumerate(todo, 1):
+        dims = variants.normalize(dims)
+        print(f"[{n}/{len(todo)}] {dims}")
+        try:
+            # Stored while the job still holds the export lock, so no form job can swap the files.
+            model = app.model_digest()
+            record = app.run_job(dims, then=lambda processed: store_variant(dims, processed, model, args.store))
+        except Exception as e:
+            print(f"  ⚠️ Failed: {e}")
+            failed += 1
+            continue
+        records[record['id']] = record
+        variants.save_records(list(records.values()), args.store, model)   # saved per variant, so a crash loses nothing
+        print(f"  cut {record['cut_length']} mm, sheet {record['sheet_area']} mm², {record['hole_count']} holes")
+
+    print(f"Done. {len(records)} variant(s) in {variants.index_path(args.store)}; {failed} failed.")
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+# test_geometry.py
+# Randomized checks of the geometry and index code against brute force:
+# the validate.py sweep, dedupe.py's canonical keys and collinear merge, and
+# variants.VariantIndex. Run with `python -m pytest test_geometry.py` or just
+# `python test_geometry.py`; the seeds are fixed so failures reproduce.
+
+import itertools
+import math
+import random
+
+import dedupe
+import validate
+import variants
+
+ROUNDS = 300
+
+# ─────────────── validate.find_intersections ───────────────
+
+def _edges(contours):
+    """(contour index, edge index, edge count, closed, segment) per non-degenerate snapped edge."""
+    edges = []
+    for ci, (_, pts, closed) in enumerate(contours):
+        n = len(pts)
+        count = n if closed else n - 1
+        for i in range(count):
+            a, b = validate._snap(pts[i]), validate._snap(pts[(i + 1) % n])
+            if a != b:
+                edges.append((ci, i, count, closed, validate._Segment(a, b, ci)))
+    return edges
+
+def _brute_intersections(contours):
+    """Every pairwise touch or crossing, except the shared vertex of consecutive edges of one contour."""
+    found = []
+    for (c1, i1, n1, closed, s), (c2, i2, _, _, t) in itertools.combinations(_edges(contours), 2):
+        if c1 == c2 and (abs(i1 - i2) == 1 or (closed and abs(i1 - i2) == n1 - 1)):
+            continue
+        pt = validate._intersection(s, t)
+        if pt is not None:
+            found.append(pt)
+    return found
+
+def _same_points(a, b, tol=1e-6):
+    """True if both point lists describe the same set of locations."""
+    def distinct(pts):
+        out = []
+        for p in pts:
+            if not any(math.dist(p, q) <= tol for q in out):
+                out.append(p)
+        return out
+    a, b = distinct(a), distinct(b)
+    return len(a) == len(b) and all(any(math.dist(p, q) <= tol for q in b) for p in a)
+
+def _random_contours(rng):
+    contours = []
+    for n in range(rng.randint(1, 4)):
+        pts = [(rng.uniform(0, 100), rng.uniform(0, 100)) for _ in range(rng.randint(2, 6))]
+        closed = len(pts) > 2 and rng.random() < 0.5
+        contours.append((f"C{n}", pts, closed))
+    # axis-aligned edges exercise the vertical-segment handling
+    x, y = rng.uniform(0, 100), rng.uniform(0, 100)
+    contours.append(("V", [(x, 0.0), (x, 100.0)], False))
+    contours.append(("H", [(0.0, y), (100.0, y)], False))
+    return contours
+
+def test_sweep_matches_brute_force():
+    rng = random.Random(1)
+    for _ in range(ROUNDS):
+        contours = _random_contours(rng)
+        swept = [pt for pt, _ in validate.find_intersections(contours)]
+        assert _same_points(swept, _brute_intersections(contours)), contours
+
+# ─────────────── dedupe keys ───────────────
+
+def test_least_rotation_matches_brute_force():
+    rng = random.Random(2)
+    for _ in range(ROUNDS * 10):
+        seq = [rng.randint(0, 2) for _ in range(rng.randint(1, 12))]
+        k = dedupe.least_rotation(seq)
+        assert seq[k:] + seq[:k] == min(seq[i:] + seq[:i] for i in range(len(seq))), seq
+
+def _reversed_polyline(points):
+    """The same closed loop travelled backwards: each bulge moves to the mirrored edge and flips sign."""
+    n = len(points)
+    return [(points[-1 - i][0], points[-1 - i][1], -points[(-2 - i) % n][2]) for i in range(n)]
+
+def test_polyline_key_ignores_start_and_direction():
+    rng = random.Random(3)
+    for _ in range(ROUNDS * 5):
+        # few distinct coordinates, so repeated edges and ties are common
+        pts = [(rng.randint(0, 2), rng.randint(0, 2), rng.choice((0.0, 0.5))) for _ in range(rng.randint(2, 8))]
+        r = rng.randrange(len(pts))
+        rotated = pts[r:] + pts[:r]
+        key = dedupe.polyline_key(pts, True)
+        assert dedupe.polyline_key(rotated, True) == key, pts
+        assert dedupe.polyline_key(_reversed_polyline(rotated), True) == key, pts
+
+# ─────────────── dedupe.merge_collinear ───────────────
+
+def _union_length(intervals):
+    total, start, end = 0.0, None, None
+    for a, b in sorted(intervals):
+        if end is None or a > end:
+            total += 0.0 if end is None else end - start
+            start, end = a, b
+        else:
+            end = max(end, b)
+    return total + (end - start)
+
+def test_merge_collinear_vertical_pairs():
+    rng = random.Random(4)
+    for _ in range(ROUNDS * 3):
+        x = rng.uniform(-500, 500)
+        merged, removed = dedupe.merge_collinear([((x, 0.0), (x, 150.0)), ((x, 100.0), (x, 300.0))])
+        assert len(merged) == 1 and abs(removed - 50.0) < 1e-6, x
+
+def test_merge_collinear_removes_the_overlap():
+    rng = random.Random(5)
+    for _ in range(ROUNDS * 3):
+        angle = rng.choice((0.0, math.pi / 2, math.pi, 1e-7, math.pi - 1e-7, rng.uniform(0, 2 * math.pi)))
+        ux, uy = math.cos(angle), math.sin(angle)
+        offset = rng.uniform(-300, 300)
+        intervals = []
+        for _ in range(rng.randint(2, 6)):
+            a = rng.uniform(0, 300)
+            intervals.append((a, a + rng.uniform(1, 100)))
+        segments = []
+        for a, b in intervals:
+            p = (-uy * offset + ux * a, ux * offset + uy * a)
+            q = (-uy * offset + ux * b, ux * offset + uy * b)
+            segments.append((p, q) if rng.random() < 0.5 else (q, p))
+        expected = sum(b - a for a, b in intervals) - _union_length(intervals)
+        _, removed = dedupe.merge_collinear(segments)
+        # overlaps within tolerance are deliberately left alone
+        assert abs(removed - expected) < 1e-6 or expected <= 2 * dedupe.TOLERANCE, (angle, intervals)
+
+# ─────────────── variants.VariantIndex ───────────────
+
+def _grid_records(rng, keep=1.0):
+    axes = [sorted(rng.sample(range(100, 400, 10), 5)), sorted(rng.sample(range(100, 400, 10), 4)),
+            sorted(rng.sample(range(100, 400, 10), 3)), [2, 3, 4], [2, 4]]
+    records = [{'id': str(i), 'dims': dict(zip(variants.DIM_KEYS, combo))}
+               for i, combo in enumerate(itertools.product(*axes)) if rng.random() < keep]
+    return axes, records
+
+def _random_dims(rng):
+    return dict(zip(variants.DIM_KEYS, (rng.uniform(50, 450), rng.uniform(50, 450), rng.uniform(50, 450),
+                                        rng.randint(1, 6), rng.randint(1, 6))))
+
+def _fits(key, wanted, fit):
+    return not fit or all(key[i] >= wanted[i] for i, name in enumerate(variants.DIM_KEYS) if name in variants.SIZE_KEYS)
+
+def test_index_get_matches_records():
+    rng = random.Random(6)
+    _, records = _grid_records(rng, keep=0.5)
+    index = variants.VariantIndex(records)
+    for r in records:
+        assert index.get(r['dims']) is r
+    assert index.get(_random_dims(rng)) is None
+
+def test_nearest_on_full_grid_is_the_brute_force_best():
+    rng = random.Random(7)
+    for _ in range(ROUNDS):
+        _, records = _grid_records(rng)
+        index = variants.VariantIndex(records)
+        dims, fit = _random_dims(rng), rng.random() < 0.5
+        wanted = variants.dims_key(dims)
+        scores = [variants.VariantIndex._score(variants.dims_key(r['dims']), wanted)
+                  for r in records if _fits(variants.dims_key(r['dims']), wanted, fit)]
+        got = index.nearest(dims, fit=fit)
+        if not scores:
+            assert got is None
+        else:
+            assert abs(variants.VariantIndex._score(variants.dims_key(got['dims']), wanted) - min(scores)) < 1e-12
+
+def test_nearest_on_sparse_grid_is_the_best_nearby_record():
+    rng = random.Random(8)
+    for _ in range(ROUNDS):
+        axes, records = _grid_records(rng, keep=0.4)
+        if not records:
+            continue
+        index = variants.VariantIndex(records)
+        dims, fit = _random_dims(rng), rng.random() < 0.5
+        wanted = variants.dims_key(dims)
+        got = index.nearest(dims, fit=fit)
+        # brute force over the cells nearest() promises to search
+        stored = [sorted({variants.dims_key(r['dims'])[i] for r in records}) for i in range(len(axes))]
+        windows = []
+        for values, w, name in zip(stored, wanted, variants.DIM_KEYS):
+            i = sum(1 for v in values if v < w)
+            if fit and name in variants.SIZE_KEYS:
+                windows.append(set(values[i:i + variants.NEAREST_STEPS]))
+            else:
+                windows.append(set(values[max(0, i - variants.NEAREST_STEPS):i + variants.NEAREST_STEPS]))
+        nearby = [r for r in records if all(k in win for k, win in zip(variants.dims_key(r['dims']), windows))]
+        if got is None:
+            assert not nearby
+            continue
+        assert _fits(variants.dims_key(got['dims']), wanted, fit)
+        best = min(variants.VariantIndex._score(variants.dims_key(r['dims']), wanted) for r in nearby)
+        assert variants.VariantIndex._score(variants.dims_key(got['dims']), wanted) <= best + 1e-12
+
+if __name__ == '__main__':
+    for name, test in list(globals().items()):
+        if name.startswith('test_'):
+            test()
+            print(f"{name}: ok")
@@ -0,0 +1,289 @@
+import ezdxf
+import heapq
+import json
+import math
+import os
+import sys
+from bisect import bisect_left, bisect_right
+
+# ─────────────── CONFIGURATION ───────────────
+SOURCE_DIR  = os.getcwd()   # Folder with DXFs to check when no files are given
+TOLERANCE   = 1e-6          # mm; endpoints closer than this are the same point
+FLATTEN_TOL = 1e-2          # mm; max deviation when arcs/circles become segments
+# ────────────────────────────────────────────────
+
+def _key(pt):
+    """Grid cell used to recognise coincident points."""
+    return (round(pt[0] / TOLERANCE), round(pt[1] / TOLERANCE))
+
+def _snap(pt):
+    """Move a point onto the TOLERANCE grid. Exports carry ~1e-11 mm noise, which
+    would otherwise tilt vertical edges and scramble the sweep's event order."""
+    kx, ky = _key(pt)
+    return (kx * TOLERANCE, ky * TOLERANCE)
+
+# ─────────────── contours ───────────────
+
+def arc_points(center, radius, start, sweep):
+    """Points along an arc (angles in radians, sweep may be negative), ends included."""
+    if radius <= FLATTEN_TOL:
+        steps = 1
+    else:
+        step = 2 * math.acos(1 - FLATTEN_TOL / radius)
+        steps = max(1, math.ceil(abs(sweep) / step))
+    return [(center[0] + radius * math.cos(start + sweep * i / steps),
+             center[1] + radius * math.sin(start + sweep * i / steps)) for i in range(steps + 1)]
+
+def bulge_points(p1, p2, bulge):
+    """Flatten one LWPOLYLINE edge; returns the points after p1, ending at p2."""
+    if abs(bulge) < 1e-12:
+        return [p2]
+    chord = math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+    sweep = 4 * math.atan(bulge)                        # signed, ccw positive
+    radius = chord / (2 * math.sin(abs(sweep) / 2))
+    mid = ((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)
+    # centre sits on the chord's perpendicular, on the left for ccw arcs
+    h = radius * math.cos(abs(sweep) / 2) * (1 if bulge > 0 else -1)
+    nx, ny = -(p2[1] - p1[1]) / chord, (p2[0] - p1[0]) / chord
+    center = (mid[0] + nx * h, mid[1] + ny * h)
+    start = math.atan2(p1[1] - center[1], p1[0] - center[0])
+    pts = arc_points(center, radius, start, sweep)[1:]
+    pts[-1] = p2                                        # exact end, no drift
+    return pts
+
+def contours_from_modelspace(msp):
+    """
+    Collect every cut path as (name, points, closed). LWPOLYLINE bulges, ARCs
+    and CIRCLEs are flattened to segments within FLATTEN_TOL.
+    """
+    contours = []
+    for pl in msp.query('LWPOLYLINE'):
+        verts = [tuple(p) for p in pl.get_points('xyb')]
+        if not verts:
+            continue
+        closed = pl.closed
+        pts = [verts[0][:2]]
+        edges = len(verts) if closed else len(verts) - 1
+        for i in range(edges):
+            nxt = verts[(i + 1) % len(verts)]
+            pts += bulge_points(pts[-1], nxt[:2], verts[i][2])
+        if not closed and len(pts) > 2 and _key(pts[0]) == _key(pts[-1]):
+            closed = True                               # ends meet, just not flagged
+        if closed and _key(pts[0]) == _key(pts[-1]):
+            pts.pop()
+        contours.append((f"LWPOLYLINE {pl.dxf.handle}", pts, closed))
+    for c in msp.query('CIRCLE'):
+        r = c.dxf.radius
+        pts = arc_points((c.dxf.center.x, c.dxf.center.y), r, 0.0, 2 * math.pi)[:-1]
+        contours.append((f"CIRCLE {c.dxf.handle}", pts, True))
+    for a in msp.query('ARC'):
+        start = math.radians(a.dxf.start_angle)
+        sweep = math.radians((a.dxf.end_angle - a.dxf.start_angle) % 360.0 or 360.0)
+        contours.append((f"ARC {a.dxf.handle}", arc_points((a.dxf.center.x, a.dxf.center.y), a.dxf.radius, start, sweep), False))
+    for l in msp.query('LINE'):
+        contours.append((f"LINE {l.dxf.handle}", [(l.dxf.start.x, l.dxf.start.y), (l.dxf.end.x, l.dxf.end.y)], False))
+    return contours
+
+def chain_ids(contours):
+    """
+    Chain id per contour: open contours whose ends meet (e.g. loose LINEs that
+    join_lines would stitch together) share an id, closed ones get their own.
+    """
+    parent = list(range(len(contours)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    first_at = {}
+    for ci, (_, pts, closed) in enumerate(contours):
+        if closed or len(pts) < 2:
+            continue
+        for pt in (pts[0], pts[-1]):
+            other = first_at.setdefault(_key(pt), ci)
+            parent[find(ci)] = find(other)
+    return [find(ci) for ci in range(len(contours))]
+
+def open_ends(contours):
+    """
+    Dangling endpoints of open contours. Loose LINEs/ARCs that chain into a
+    loop meet another open end and are not reported.
+    """
+    degree, where = {}, {}
+    for name, pts, closed in contours:
+        if closed or len(pts) < 2:
+            continue
+        for pt in (pts[0], pts[-1]):
+            k = _key(pt)
+            degree[k] = degree.get(k, 0) + 1
+            where.setdefault(k, (pt, name))
+    return [where[k] for k, d in degree.items() if d % 2]
+
+# ─────────────── Bentley–Ottmann sweep ───────────────
+
+class _Segment:
+    __slots__ = ('p', 'q', 'contour', 'vertical', 'slope')
+
+    def __init__(self, a, b, contour):
+        self.p, self.q = (a, b) if a < b else (b, a)    # p is the left (lower) end
+        self.contour = contour
+        dx = self.q[0] - self.p[0]
+        self.vertical = dx == 0
+        self.slope = math.inf if self.vertical else (self.q[1] - self.p[1]) / dx
+
+    def y_at(self, x, y_event):
+        """Height at sweep position x; a vertical segment sits at the event point."""
+        if self.vertical:
+            return min(max(y_event, self.p[1]), self.q[1])
+        return self.p[1] + (x - self.p[0]) * self.slope
+
+def _intersection(s, t):
+    """Single crossing point of two segments, or None (also for collinear overlap)."""
+    (x1, y1), (x2, y2) = s.p, s.q
+    (x3, y3), (x4, y4) = t.p, t.q
+    d = (x2 - x1) * (y4 - y3) - (y2 - y1) * (x4 - x3)
+    if d == 0:
+        return None
+    u = ((x3 - x1) * (y4 - y3) - (y3 - y1) * (x4 - x3)) / d
+    v = ((x3 - x1) * (y2 - y1) - (y3 - y1) * (x2 - x1)) / d
+    eps = 1e-12
+    if -eps <= u <= 1 + eps and -eps <= v <= 1 + eps:
+        return (x1 + u * (x2 - x1), y1 + u * (y2 - y1))
+    return None
+
+def find_intersections(contours, chains=None):
+    """
+    Report every point where cut paths touch or cross, other than the shared
+    vertex of two consecutive edges of the same chain (see chain_ids).
+    Bentley–Ottmann sweep: events (segment ends and discovered crossings) come
+    off a heap in x, y order and only neighbours in the sweep status are ever
+    tested, so the search is O((n + k) log n) comparisons for n segments and
+    k crossings.
+    Returns a list of ((x, y), set of contour indices).
+    """
+    chains = chains if chains is not None else list(range(len(contours)))
+    starts, events, queued = {}, [], set()
+
+    def push(pt):
+        k = _key(pt)
+        if k not in queued:
+            queued.add(k)
+            heapq.heappush(events, (pt[0], pt[1], k))
+
+    for ci, (_, pts, closed) in enumerate(contours):
+        n = len(pts)
+        for i in range(n if closed else n - 1):
+            a, b = _snap(pts[i]), _snap(pts[(i + 1) % n])
+            if a == b:
+                continue
+            seg = _Segment(a, b, ci)
+            starts.setdefault(_key(seg.p), []).append(seg)
+            push(seg.p)
+            push(seg.q)
+
+    status, found = [], []
+
+    def check(s, t, x, y):
+        if s is None or t is None:
+            return
+        pt = _intersection(s, t)
+        if pt is not None and (pt[0] > x + TOLERANCE or (abs(pt[0] - x) <= TOLERANCE and pt[1] > y + TOLERANCE)):
+            push(pt)
+
+    while events:
+        x, y, k = heapq.heappop(events)
+        key = lambda s: s.y_at(x, y)
+        lo = bisect_left(status, y - TOLERANCE, key=key)
+        hi = bisect_right(status, y + TOLERANCE, key=key)
+        through = status[lo:hi]                         # segments ending at or containing the event
+        upper = starts.get(k, [])
+
+        ending   = [s for s in through if _key(s.q) == k]
+        interior = [s for s in through if _key(s.q) != k and _key(s.p) != k]
+        touching = ending + upper
+        if interior or len(touching) > 2 or (len(touching) == 2 and chains[touching[0].contour] != chains[touching[1].contour]):
+            found.append(((x, y), {s.contour for s in interior + touching}))
+
+        # Replace everything through the event by what continues right of it,
+        # ordered by slope, i.e. by height just after the event.
+        del status[lo:hi]
+        passing = sorted(interior + upper, key=lambda s: s.slope)
+        status[lo:lo] = passing
+
+        below = status[lo - 1] if lo > 0 else None
+        if passing:
+            above = status[lo + len(passing)] if lo + len(passing) < len(status) else None
+            check(below, passing[0], x, y)
+            check(passing[-1], above, x, y)
+        else:
+            above = status[lo] if lo < len(status) else None
+            check(below, above, x, y)
+    return found
+
+# ─────────────── reporting ───────────────
+
+def validate_contours(contours):
+    """Return {'open_ends': [...], 'self_intersections': [...], 'crossings': [...]}."""
+    chains = chain_ids(contours)
+    report = {'open_ends': open_ends(contours), 'self_intersections': [], 'crossings': []}
+    for pt, members in find_intersections(contours, chains):
+        names = sorted(contours[i][0] for i in members)
+        if len({chains[i] for i in members}) == 1:
+            report['self_intersections'].append((pt, ' + '.join(names)))
+        else:
+            report['crossings'].append((pt, names))
+    return report
+
+def problem_count(report):
+    return sum(len(v) for v in report.values())
+
+def validate_file(path):
+    doc = ezdxf.readfile(path)
+    return validate_contours(contours_from_modelspace(doc.modelspace()))
+
+def report_json(fname, report):
+    """The report as plain JSON data, for tools and for the download bundle."""
+    at = lambda pt: [round(float(pt[0]), 6), round(float(pt[1]), 6)]
+    return {
+        'file': fname,
+        'problems': problem_count(report),
+        'open_ends': [{'at': at(pt), 'contour': name} for pt, name in report['open_ends']],
+        'self_intersections': [{'at': at(pt), 'contour': name} for pt, name in report['self_intersections']],
+        'crossings': [{'at': at(pt), 'contours': names} for pt, names in report['crossings']],
+    }
+
+def write_report(path, fname, report):
+    with open(path, 'w') as f:
+        json.dump(report_json(fname, report), f, indent=2)
+
+def print_report(fname, report):
+    if not problem_count(report):
+        print(f"'{fname}': OK")
+        return
+    print(f"'{fname}': {problem_count(report)} problem(s)")
+    for (x, y), name in report['open_ends']:
+        print(f"  ⚠️ open end of {name} at ({x:.4f}, {y:.4f})")
+    for (x, y), name in report['self_intersections']:
+        print(f"  ⚠️ {name} intersects itself at ({x:.4f}, {y:.4f})")
+    for (x, y), names in report['crossings']:
+        print(f"  ⚠️ {' / '.join(names)} cross at ({x:.4f}, {y:.4f})")
+
+def main(paths):
+    if not paths:
+        paths = [os.path.join(SOURCE_DIR, f) for f in sorted(os.listdir(SOURCE_DIR)) if f.lower().endswith('.dxf')]
+    failed = 0
+    for path in paths:
+        try:
+            report = validate_file(path)
+        except Exception as e:
+            print(f"  ⚠️ Error validating '{os.path.basename(path)}': {e}")
+            failed += 1
+            continue
+        print_report(os.path.basename(path), report)
+        failed += bool(problem_count(report))
+    return 1 if failed else 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,188 @@
+# variants.py
+# Content-addressed store and sorted index of precomputed box variants. Every
+# record notes the digest of the model it was exported from; only records of
+# the current model are served.
+# precompute.py fills it; app.py answers lookups from it without running Fusion.
+
+import hashlib
+import itertools
+import json
+import math
+import os
+import shutil
+from bisect import bisect_left
+
+# ─────────────── CONFIGURATION ───────────────
+STORE_DIR  = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'store')
+DIM_KEYS   = ('Length', 'Width', 'Height', 'Length_Screws', 'Width_Screws')
+SIZE_KEYS  = ('Length', 'Width', 'Height')           # mm, continuous
+COUNT_KEYS = ('Length_Screws', 'Width_Screws')       # discrete
+MIN_SIZE   = 100                                     # mm, same limits as demo.py
+NEAREST_STEPS = 2   # grid values searched on each side of a request when its nearest grid point is missing
+# ────────────────────────────────────────────────
+
+def check_dims(dims):
+    """Raise ValueError unless dims satisfy the model's constraints (see demo.py)."""
+    _check_finite(dims)
+    if dims['Length_Screws'] <= 0 or dims['Width_Screws'] <= 0:
+        raise ValueError("Length_Screws and Width_Screws must be > 0.")
+    if dims['Length'] < MIN_SIZE or dims['Width'] < MIN_SIZE or dims['Height'] < MIN_SIZE:
+        raise ValueError(f"Length, Width, Height must be >= {MIN_SIZE} mm.")
+
+def _check_finite(dims):
+    # NaN compares false against every limit and inf has no int(), so reject both up front.
+    for k in DIM_KEYS:
+        if not math.isfinite(float(dims[k])):
+            raise ValueError(f"{k} must be a finite number.")
+
+def normalize(dims):
+    """Cast a dims mapping to the types NewScript1.py uses (ints for counts, floats for sizes)."""
+    _check_finite(dims)
+    return {k: (int(dims[k]) if k in COUNT_KEYS else float(dims[k])) for k in DIM_KEYS}
+
+def dims_key(dims):
+    """Sort key of a variant: its dims in DIM_KEYS order."""
+    d = normalize(dims)
+    return tuple(d[k] for k in DIM_KEYS)
+
+def variant_id(dims):
+    """Stable id of a variant, derived from its normalized dims."""
+    blob = json.dumps(normalize(dims), sort_keys=True).encode()
+    return hashlib.sha256(blob).hexdigest()[:16]
+
+def record_etag(record):
+    """ETag of a stored variant: changes only if a re-export changed its files."""
+    blob = json.dumps(record['files'], sort_keys=True).encode()
+    return f"{record['id']}-{hashlib.sha256(blob).hexdigest()[:16]}"
+
+# ─────────────── object store ───────────────
+
+def object_path(sha, store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'objects', sha[:2], sha[2:])
+
+def put_object(path, store_dir=STORE_DIR):
+    """Copy a file into the store under its SHA-256 and return the hash. Identical files are stored once."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(64 * 1024), b''):
+            h.update(chunk)
+    sha = h.hexdigest()
+    dest = object_path(sha, store_dir)
+    if not os.path.exists(dest):
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        tmp = dest + '.tmp'
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, dest)   # readers never see a half-written object
+    return sha
+
+# ─────────────── index ───────────────
+
+def index_path(store_dir=STORE_DIR):
+    return os.path.join(store_dir, 'index.json')
+
+def load_records(store_dir=STORE_DIR):
+    path = index_path(store_dir)
+    if not os.path.exists(path):
+        return []
+    with open(path, 'r') as f:
+        return json.load(f)['variants']
+
+def save_records(records, store_dir=STORE_DIR, model=None):
+    """Write the index sorted by dims, atomically. `model` is the digest of the model the store was last filled from."""
+    os.makedirs(store_dir, exist_ok=True)
+    path = index_path(store_dir)
+    records = sorted(records, key=lambda r: dims_key(r['dims']))
+    with open(path + '.tmp', 'w') as f:
+        json.dump({'dim_keys': DIM_KEYS, 'model': model, 'variants': records}, f, indent=2)
+    os.replace(path + '.tmp', path)
+
+class VariantIndex:
+    """
+    Read-only view of the index. Records are kept sorted by dims so exact
+    lookups are a bisect. Precomputed variants form a grid, so the nearest
+    variant is found axis by axis, each with its own bisect over that axis's
+    sorted values; only if that grid point is missing (a failed export) are
+    the cells around it searched, NEAREST_STEPS values per side on each axis.
+    """
+
+    def __init__(self, records):
+        self.records = sorted(records, key=lambda r: dims_key(r['dims']))
+        self._keys   = [dims_key(r['dims']) for r in self.records]
+        self._axes   = [sorted({k[i] for k in self._keys}) for i in range(len(DIM_KEYS))]
+        self._by_id  = {r['id']: r for r in self.records}
+        self.stale   = 0   # records skipped by load() because they belong to another model
+
+    @classmethod
+    def load(cls, store_dir=STORE_DIR, model=None):
+        """
+        Index of the stored variants exported from the model with digest `model`.
+        Records of other (older) models are left out, so they are never served.
+        """
+        records = load_records(store_dir)
+        index = cls([r for r in records if model is not None and r.get('model') == model])
+        index.stale = len(records) - len(index)
+        return index
+
+    def __len__(self):
+        return len(self.records)
+
+    def get(self, dims):
+        """Record with exactly these dims, or None."""
+        return self._lookup(dims_key(dims))
+
+    def _lookup(self, key):
+        i = bisect_left(self._keys, key)
+        if i < len(self._keys) and self._keys[i] == key:
+            return self.records[i]
+        return None
+
+    def by_id(self, vid):
+        return self._by_id.get(vid)
+
+    @staticmethod
+    def _pick(values, wanted, at_least):
+        """Closest entry of sorted `values` to `wanted` (or the smallest >= it if `at_least`)."""
+        i = bisect_left(values, wanted)
+        if at_least:
+            return values[i] if i < len(values) else None
+        below = values[i - 1] if i > 0 else None
+        above = values[i] if i < len(values) else None
+        if below is None or (above is not None and above - wanted <= wanted - below):
+            return above
+        return below
+
+    @staticmethod
+    def _score(key, wanted):
+        """Relative squared distance between two dims keys."""
+        return sum(((k - w) / max(abs(w), 1)) ** 2 for k, w in zip(key, wanted))
+
+    def nearest(self, dims, fit=False):
+        """
+        Closest precomputed variant. With fit=True, Length/Width/Height must be
+        at least the requested size (the box still fits its contents); screw
+        counts are always matched as closely as possible. If the grid point
+        closest on every axis was not stored, the best stored variant within
+        NEAREST_STEPS grid values per axis is returned. Returns None if the
+        index is empty or nothing fits.
+        """
+        wanted = dims_key(dims)
+        at_least = [fit and name in SIZE_KEYS for name in DIM_KEYS]
+        picked = tuple(self._pick(axis, w, a) for axis, w, a in zip(self._axes, wanted, at_least))
+        if None in picked:
+            return None            # empty index, or no stored size is large enough
+        hit = self._lookup(picked)
+        if hit is not None:
+            return hit
+        # Sparse grid: look at the neighbouring cells only, never at every record.
+        windows = []
+        for axis, w, a in zip(self._axes, wanted, at_least):
+            i = bisect_left(axis, w)
+            windows.append(axis[i:i + NEAREST_STEPS] if a else axis[max(0, i - NEAREST_STEPS):i + NEAREST_STEPS])
+        best, best_score = None, None
+        for key in itertools.product(*windows):
+            record = self._lookup(key)
+            if record is not None:
+                score = self._score(key, wanted)
+                if best_score is None or score < best_score:
+                    best, best_score = record, score
+        return best